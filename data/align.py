@@ -8,43 +8,68 @@ Usage:
     python align.py --segment S08    # Print all witnesses for a section
     python align.py --export         # Export normalized segments to data/segments/
     python align.py --stats          # Print coverage statistics
+    python align.py --watch          # Rebuild segments and DOCX as inputs change
+    python align.py --snapshot       # Cache parsed alignment/collation data
+
+Witnesses (sigla, names, transcript files) are declared in the alignment map
+metadata; any number is supported. Transcripts are only read by commands that
+need witness text, per-witness segmentation fans out to a process pool once
+the transcripts are large enough to repay starting it, and the JSON maps are
+loaded from the --snapshot cache while it is newer than both files.
 """
 
 import json
+import marshal
 import re
 import os
 import sys
+from functools import lru_cache
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
 ALIGNMENT_FILE = DATA_DIR / "alignment_map.json"
+COLLATION_FILE = DATA_DIR / "collation_map.json"
+SEGMENTS_DIR = DATA_DIR / "segments"
+SNAPSHOT_FILE = DATA_DIR / "edition.snapshot"
 
-WITNESS_FILES = {
-    "W": "woodruff.md",
-    "B": "bullock.md",
-    "R": "richards.md",
-    "C": "clayton.md",
-}
+# Transcript bytes below which segmenting in-process beats starting workers
+PARALLEL_MIN_BYTES = 4 * 1024 * 1024
 
+# Line that closes the transcript header (title + "Document Transcript")
+HEADER_END_MARKER = "Document Transcript"
+# Heading line that opens the footnotes section
+FOOTNOTES_HEADING = "Footnotes"
 
-def load_transcript(siglum: str) -> str:
-    """Load a witness transcript, returning only the body text (no header, no footnotes)."""
-    filepath = BASE_DIR / WITNESS_FILES[siglum]
+PAGE_MARKER_RE = re.compile(r'\[p\.\s*\[?\d+\]?\]')
+
+
+def is_header_end(line: str) -> bool:
+    """True if the line is the last line of the transcript header."""
+    return HEADER_END_MARKER in line
+
+
+def is_footnotes_start(line: str) -> bool:
+    """True if the line opens the footnotes section."""
+    return line.strip() == FOOTNOTES_HEADING
+
+
+def read_transcript_body(filepath: Path) -> str:
+    """Read a transcript file, returning only the body text (no header, no footnotes)."""
     with open(filepath, "r", encoding="utf-8") as f:
         lines = f.readlines()
 
     # Skip header (first two lines: title + "Document Transcript")
     body_start = 0
     for i, line in enumerate(lines):
-        if "Document Transcript" in line:
+        if is_header_end(line):
             body_start = i + 1
             break
 
     # Find footnotes section
     body_end = len(lines)
     for i in range(body_start, len(lines)):
-        if lines[i].strip() == "Footnotes":
+        if is_footnotes_start(lines[i]):
             body_end = i
             break
 
@@ -52,9 +77,32 @@ def load_transcript(siglum: str) -> str:
     return body
 
 
+def load_transcript(siglum: str, witnesses=None) -> str:
+    """Load a witness transcript, returning only the body text (no header, no footnotes)."""
+    if witnesses is None:
+        witnesses = load_witnesses()
+    return read_transcript_body(witnesses.path(siglum))
+
+
+class LazyTranscripts(dict):
+    """Transcript bodies keyed by siglum, each loaded on first access."""
+
+    def __init__(self, witnesses):
+        super().__init__()
+        self.witnesses = witnesses
+
+    def __missing__(self, siglum):
+        body = self[siglum] = load_transcript(siglum, self.witnesses)
+        return body
+
+
+@lru_cache(maxsize=32)
 def normalize_text(text: str) -> str:
     """Normalize transcript text for comparison purposes.
 
+    Results are cached, so passage lookups against the same transcript body
+    only normalize it once.
+
     - Removes page markers [p. [133]]
     - Expands interlinear insertions <text> into the text
     - Expands abbreviated words: con[ference] -> conference
@@ -62,7 +110,7 @@ def normalize_text(text: str) -> str:
     - Normalizes whitespace
     """
     # Remove page markers
-    text = re.sub(r'\[p\.\s*\[?\d+\]?\]', '', text)
+    text = PAGE_MARKER_RE.sub('', text)
 
     # Remove blank line markers like [25 lines blank], [1/3 page blank]
     text = re.sub(r'\[[\d/]+ (?:lines? )?blank\]', '', text)
@@ -90,10 +138,21 @@ def normalize_text(text: str) -> str:
     return text
 
 
+# Characters returned from the start marker when the end marker is not found
+FALLBACK_PASSAGE_CHARS = 500
+
+
+class TruncatedPassage(str):
+    """A find_passage result cut off after FALLBACK_PASSAGE_CHARS because the
+    end marker was not found. The text reads as before (ending in "..."), but
+    it is not the whole passage: nothing past the cut can be assumed absent."""
+
+
 def find_passage(body: str, start_marker: str, end_marker: str) -> str:
     """Extract a passage from the body text between start and end markers.
 
-    Uses fuzzy matching to find the closest match for the markers.
+    Uses fuzzy matching to find the closest match for the markers. If only the
+    start marker is found, returns a TruncatedPassage.
     """
     # Normalize for searching
     norm_body = normalize_text(body)
@@ -121,7 +180,8 @@ def find_passage(body: str, start_marker: str, end_marker: str) -> str:
 
     if end_idx == -1 or end_idx <= start_idx:
         # Return from start to end of a reasonable chunk
-        return norm_body[start_idx:start_idx + 500] + "..."
+        return TruncatedPassage(
+            norm_body[start_idx:start_idx + FALLBACK_PASSAGE_CHARS] + "...")
 
     # Include the end marker text
     end_idx = norm_body.find(" ", end_idx + len(end_clean))
@@ -131,10 +191,114 @@ def find_passage(body: str, start_marker: str, end_marker: str) -> str:
     return norm_body[start_idx:end_idx].strip()
 
 
+def _source_stamp(path: Path) -> tuple:
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _load_snapshot_entry(path: Path):
+    """Return the snapshotted data for a JSON file, or None if the snapshot is
+    missing, was written by another Python version, or predates the file."""
+    try:
+        with open(SNAPSHOT_FILE, "rb") as f:
+            snapshot = marshal.loads(f.read())
+        entry = snapshot["sources"][path.name]
+        if snapshot["python"] != tuple(sys.version_info[:2]):
+            return None
+        if entry["stamp"] != _source_stamp(path):
+            return None
+    except (OSError, EOFError, ValueError, TypeError, KeyError):
+        return None
+    return entry["data"]
+
+
+def _load_json(path: Path):
+    data = _load_snapshot_entry(path)
+    if data is None:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    return data
+
+
 def load_alignment():
     """Load the alignment map."""
-    with open(ALIGNMENT_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return _load_json(ALIGNMENT_FILE)
+
+
+def load_collation():
+    """Load the collation map (critical apparatus)."""
+    return _load_json(COLLATION_FILE)
+
+
+class WitnessRegistry:
+    """The witnesses declared in the alignment map metadata.
+
+    Iterates over sigla in declaration order; each entry carries at least a
+    "name" and the transcript "file" (relative to the repository root).
+    """
+
+    def __init__(self, metadata: dict):
+        self.entries = metadata["witnesses"]
+        self.base_text = metadata.get("base_text")
+        for sig, entry in self.entries.items():
+            if "file" not in entry:
+                raise ValueError(f"Witness {sig} has no transcript file in alignment_map.json")
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, siglum):
+        return siglum in self.entries
+
+    def name(self, siglum: str) -> str:
+        return self.entries[siglum]["name"]
+
+    def filename(self, siglum: str) -> str:
+        return self.entries[siglum]["file"]
+
+    def path(self, siglum: str) -> Path:
+        return BASE_DIR / self.entries[siglum]["file"]
+
+    def display_order(self) -> list:
+        """Sigla with the base text first, then declaration order."""
+        sigla = list(self.entries)
+        if self.base_text in self.entries:
+            sigla.remove(self.base_text)
+            sigla.insert(0, self.base_text)
+        return sigla
+
+
+def load_witnesses(alignment=None) -> WitnessRegistry:
+    """Build the witness registry from the alignment map metadata."""
+    if alignment is None:
+        alignment = load_alignment()
+    return WitnessRegistry(alignment["metadata"])
+
+
+def write_snapshot():
+    """Marshal the parsed alignment and collation maps to SNAPSHOT_FILE.
+
+    Each entry records the source file's mtime and size, so a snapshot is
+    ignored (not wrong) as soon as either JSON file is edited.
+    """
+    sources = {}
+    for path in (ALIGNMENT_FILE, COLLATION_FILE):
+        stamp = _source_stamp(path)
+        with open(path, "r", encoding="utf-8") as f:
+            sources[path.name] = {"stamp": stamp, "data": json.load(f)}
+
+    snapshot = {"python": tuple(sys.version_info[:2]), "sources": sources}
+    with open(SNAPSHOT_FILE, "wb") as f:
+        f.write(marshal.dumps(snapshot))
+    print(f"Wrote {SNAPSHOT_FILE.name} ({len(sources)} sources)")
+
+
+def segment_path(section_id: str, siglum: str) -> Path:
+    """Path of the exported segment file for a section and witness."""
+    return SEGMENTS_DIR / f"{section_id}_{siglum}.txt"
 
 
 def get_section_text(section: dict, siglum: str, transcripts: dict) -> str:
@@ -157,36 +321,82 @@ def get_section_text(section: dict, siglum: str, transcripts: dict) -> str:
     return "[No data]"
 
 
-def print_overview(alignment, transcripts):
+def _segment_witness(task):
+    """Worker: load, normalize and segment one witness.
+
+    Takes (siglum, transcript path, sections trimmed to that witness) and
+    returns {section id: normalized text}.
+    """
+    siglum, path, sections = task
+    transcripts = {siglum: read_transcript_body(path)}
+    return {s["id"]: get_section_text(s, siglum, transcripts) for s in sections}
+
+
+def compute_segments(alignment, witnesses, jobs=None) -> dict:
+    """Normalized text for every (section id, siglum), one task per witness.
+
+    jobs=1 runs in-process and jobs > 1 uses that many worker processes. By
+    default a pool (one worker per CPU) is only used when there are several
+    witnesses and CPUs and at least PARALLEL_MIN_BYTES of transcripts.
+    """
+    tasks = [
+        (sig, witnesses.path(sig),
+         [{"id": s["id"], sig: s.get(sig, {})} for s in alignment["sections"]])
+        for sig in witnesses
+    ]
+    if jobs is None:
+        parallel = ((os.cpu_count() or 1) > 1 and len(tasks) > 1
+                    and sum(os.path.getsize(path) for _, path, _ in tasks)
+                    >= PARALLEL_MIN_BYTES)
+    else:
+        parallel = jobs > 1 and len(tasks) > 1
+
+    if not parallel:
+        results = [_segment_witness(task) for task in tasks]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(_segment_witness, tasks))
+
+    segments = {}
+    for (sig, _, _), texts in zip(tasks, results):
+        for sid, text in texts.items():
+            segments[(sid, sig)] = text
+    return segments
+
+
+def print_overview(alignment, witnesses):
     """Print an overview of all sections and which witnesses cover them."""
+    widths = {sig: max(3, len(sig) + 2) for sig in witnesses}
     print("=" * 80)
     print("KING FOLLETT DISCOURSE - ALIGNMENT OVERVIEW")
     print("=" * 80)
     print()
-    print(f"{'ID':<6} {'Section':<50} {'W':>3} {'B':>3} {'R':>3} {'C':>3}")
-    print("-" * 70)
+    print(f"{'ID':<6} {'Section':<50} " + " ".join(f"{sig:>{widths[sig]}}" for sig in witnesses))
+    print("-" * (58 + sum(widths.values()) + len(widths) - 1))
 
     for section in alignment["sections"]:
         sid = section["id"]
         label = section["label"][:48]
 
         coverage = {}
-        for sig in ["W", "B", "R", "C"]:
+        for sig in witnesses:
             w_data = section.get(sig, {})
             if isinstance(w_data, dict) and w_data.get("present") is False:
-                coverage[sig] = " - "
+                coverage[sig] = "-"
             elif isinstance(w_data, dict) and w_data.get("text_start"):
-                coverage[sig] = " + "
+                coverage[sig] = "+"
             else:
-                coverage[sig] = " ? "
+                coverage[sig] = "?"
 
-        print(f"{sid:<6} {label:<50} {coverage['W']:>3}{coverage['B']:>3}{coverage['R']:>3}{coverage['C']:>3}")
+        # Same widths and separator as the header, so marks sit under their sigla
+        print(f"{sid:<6} {label:<50} " + " ".join(f"{coverage[sig]:>{widths[sig]}}" for sig in witnesses))
 
     print()
     print("Legend: + = present, - = omitted, ? = uncertain")
 
 
-def print_section(alignment, transcripts, section_id):
+def print_section(alignment, witnesses, section_id):
     """Print all witness texts for a given section."""
     section = None
     for s in alignment["sections"]:
@@ -203,8 +413,9 @@ def print_section(alignment, transcripts, section_id):
     print(f"Summary: {section['summary']}")
     print("=" * 80)
 
-    for sig in ["W", "B", "R", "C"]:
-        name = alignment["metadata"]["witnesses"][sig]["name"]
+    transcripts = LazyTranscripts(witnesses)
+    for sig in witnesses:
+        name = witnesses.name(sig)
         text = get_section_text(section, sig, transcripts)
         print(f"\n[{sig}] {name}:")
         print("-" * 40)
@@ -222,25 +433,25 @@ def print_section(alignment, transcripts, section_id):
     print()
 
 
-def print_stats(alignment, transcripts):
+def print_stats(alignment, witnesses):
     """Print coverage statistics."""
     print("=" * 80)
     print("COVERAGE STATISTICS")
     print("=" * 80)
 
     total_sections = len(alignment["sections"])
-    coverage = {sig: 0 for sig in ["W", "B", "R", "C"]}
+    coverage = {sig: 0 for sig in witnesses}
 
     for section in alignment["sections"]:
-        for sig in ["W", "B", "R", "C"]:
+        for sig in witnesses:
             w_data = section.get(sig, {})
             if isinstance(w_data, dict) and w_data.get("present") is not False and w_data.get("text_start"):
                 coverage[sig] += 1
 
     print(f"\nTotal thematic sections: {total_sections}")
     print()
-    for sig in ["B", "C", "W", "R"]:
-        name = alignment["metadata"]["witnesses"][sig]["name"]
+    for sig in witnesses.display_order():
+        name = witnesses.name(sig)
         count = coverage[sig]
         pct = count / total_sections * 100
         bar = "#" * int(pct / 2)
@@ -248,8 +459,8 @@ def print_stats(alignment, transcripts):
 
     print()
     print("Sections absent from each witness:")
-    for sig in ["W", "B", "R", "C"]:
-        name = alignment["metadata"]["witnesses"][sig]["name"]
+    for sig in witnesses:
+        name = witnesses.name(sig)
         missing = []
         for section in alignment["sections"]:
             w_data = section.get(sig, {})
@@ -261,41 +472,46 @@ def print_stats(alignment, transcripts):
             print(f"  [{sig}] {name}: (none)")
 
 
-def export_segments(alignment, transcripts):
+def export_segments(alignment, witnesses):
     """Export normalized segments to individual files for Phase 2 processing."""
-    seg_dir = DATA_DIR / "segments"
-    seg_dir.mkdir(exist_ok=True)
+    SEGMENTS_DIR.mkdir(exist_ok=True)
 
-    for section in alignment["sections"]:
-        sid = section["id"]
-        for sig in ["W", "B", "R", "C"]:
-            text = get_section_text(section, sig, transcripts)
-            outfile = seg_dir / f"{sid}_{sig}.txt"
-            with open(outfile, "w", encoding="utf-8") as f:
-                f.write(text)
+    segments = compute_segments(alignment, witnesses)
+    for (sid, sig), text in segments.items():
+        with open(segment_path(sid, sig), "w", encoding="utf-8") as f:
+            f.write(text)
 
-    print(f"Exported {len(alignment['sections']) * 4} segment files to {seg_dir}")
+    print(f"Exported {len(segments)} segment files to {SEGMENTS_DIR}")
 
 
 def main():
+    if sys.argv[1:2] == ["--watch"]:
+        # The watcher keeps its own in-memory copy of the edition data
+        from watch import watch
+        watch()
+        return
+
+    if sys.argv[1:2] == ["--help"]:
+        print(__doc__)
+        return
+    if sys.argv[1:2] == ["--snapshot"]:
+        write_snapshot()
+        return
+
     # Load data
     alignment = load_alignment()
-    transcripts = {}
-    for sig in ["W", "B", "R", "C"]:
-        transcripts[sig] = load_transcript(sig)
+    witnesses = load_witnesses(alignment)
 
     # Parse arguments
     if len(sys.argv) == 1:
-        print_overview(alignment, transcripts)
+        print_overview(alignment, witnesses)
     elif sys.argv[1] == "--segment" and len(sys.argv) > 2:
         section_id = sys.argv[2].upper()
-        print_section(alignment, transcripts, section_id)
+        print_section(alignment, witnesses, section_id)
     elif sys.argv[1] == "--stats":
-        print_stats(alignment, transcripts)
+        print_stats(alignment, witnesses)
     elif sys.argv[1] == "--export":
-        export_segments(alignment, transcripts)
-    elif sys.argv[1] == "--help":
-        print(__doc__)
+        export_segments(alignment, witnesses)
     else:
         print(f"Unknown argument: {sys.argv[1]}")
         print(__doc__)
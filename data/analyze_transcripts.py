@@ -0,0 +1,185 @@
+"""
+King Follett Discourse - Transcript Analyzer
+Regenerates transcript_analysis.json (word counts and structural metrics) and
+refreshes the witness word counts recorded in alignment_map.json metadata.
+
+Each transcript is read in a single streaming pass: header, body and footnotes
+are split with the same markers as align.load_transcript, and every statistic
+is accumulated line by line. Witnesses are analyzed in parallel.
+
+Usage:
+    python analyze_transcripts.py            # Rewrite both JSON files in place
+    python analyze_transcripts.py --check    # Exit 1 if either file is stale
+"""
+
+import json
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from align import (
+    ALIGNMENT_FILE,
+    DATA_DIR,
+    PAGE_MARKER_RE,
+    is_footnotes_start,
+    is_header_end,
+    load_alignment,
+    load_witnesses,
+)
+
+ANALYSIS_FILE = DATA_DIR / "transcript_analysis.json"
+
+# Abbreviated words expanded by the editors: con[ference]
+EXPANSION_RE = re.compile(r'\w\[\w+\]')
+# Interlinear insertions: <​text​>
+INSERTION_RE = re.compile(r'<[^>]*>')
+
+
+class _BodyStats:
+    """Running statistics for the body text of one transcript."""
+
+    def __init__(self):
+        self.word_count = 0
+        self.paragraph_count = 0
+        self.page_markers = []
+        self.editorial_expansions = 0
+        self.interlinear_insertions = 0
+        # Length of the stripped body, plus whitespace not yet known to be
+        # interior (it only counts if more text follows)
+        self.length = 0
+        self.pending_ws = 0
+
+    def add(self, line: str):
+        stripped = line.rstrip()
+        if stripped:
+            if self.length:
+                self.length += self.pending_ws + len(stripped)
+            else:
+                self.length = len(stripped.lstrip())
+            self.pending_ws = len(line) - len(stripped)
+            self.paragraph_count += 1
+        elif self.length:
+            self.pending_ws += len(line)
+
+        markers = PAGE_MARKER_RE.findall(line)
+        self.page_markers.extend(markers)
+        if markers:
+            line = PAGE_MARKER_RE.sub('', line)
+        self.word_count += len(line.split())
+        self.editorial_expansions += len(EXPANSION_RE.findall(line))
+        self.interlinear_insertions += len(INSERTION_RE.findall(line))
+
+
+def analyze_transcript(path) -> dict:
+    """Compute the structural metrics for one transcript in a single pass."""
+    body = _BodyStats()
+    header_seen = False
+    footnote_lines = 0
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not header_seen and is_header_end(line):
+                # Anything read so far was header, not body
+                header_seen = True
+                body = _BodyStats()
+                footnote_lines = 0
+            elif footnote_lines or is_footnotes_start(line):
+                footnote_lines += 1
+            else:
+                body.add(line)
+
+    return {
+        "word_count": body.word_count,
+        "paragraph_count": body.paragraph_count,
+        "page_count": len(body.page_markers),
+        "page_markers": body.page_markers,
+        "editorial_expansions": body.editorial_expansions,
+        "interlinear_insertions": body.interlinear_insertions,
+        "footnote_lines": footnote_lines,
+        "body_text_length": body.length,
+    }
+
+
+def build_analysis(alignment: dict) -> dict:
+    """Analyze every witness in parallel, keyed by siglum."""
+    witnesses = load_witnesses(alignment)
+    sigla = list(witnesses)
+    with ProcessPoolExecutor() as pool:
+        results = pool.map(analyze_transcript, [witnesses.path(sig) for sig in sigla])
+
+    analysis = {}
+    for sig, stats in zip(sigla, results):
+        analysis[sig] = {"name": witnesses.name(sig),
+                         "filename": witnesses.filename(sig), **stats}
+    return analysis
+
+
+def render_analysis(analysis: dict) -> str:
+    return json.dumps(analysis, indent=2, ensure_ascii=False)
+
+
+def render_alignment(alignment_text: str, analysis: dict):
+    """Rewrite the witness word counts in the alignment map source text.
+
+    Only the numbers are substituted, so the hand-formatted layout of
+    alignment_map.json is left untouched. Returns (text, missing), where
+    missing lists the witnesses whose metadata has no word_count to update.
+    """
+    missing = []
+    for sig, stats in analysis.items():
+        pattern = re.compile(r'("%s":\s*\{[^{}]*?"word_count":\s*)\d+' % re.escape(sig))
+        alignment_text, count = pattern.subn(
+            lambda m: m.group(1) + str(stats["word_count"]), alignment_text, count=1
+        )
+        if not count:
+            missing.append(sig)
+    return alignment_text, missing
+
+
+def main():
+    check = "--check" in sys.argv[1:]
+
+    alignment = load_alignment()
+    analysis = build_analysis(alignment)
+
+    with open(ALIGNMENT_FILE, "r", encoding="utf-8") as f:
+        alignment_text = f.read()
+    try:
+        with open(ANALYSIS_FILE, "r", encoding="utf-8") as f:
+            analysis_text = f.read()
+    except FileNotFoundError:
+        analysis_text = ""
+
+    new_alignment_text, missing = render_alignment(alignment_text, analysis)
+    outputs = [
+        (ANALYSIS_FILE, analysis_text, render_analysis(analysis)),
+        (ALIGNMENT_FILE, alignment_text, new_alignment_text),
+    ]
+
+    stale = [path for path, old, new in outputs if old != new]
+    if missing:
+        print(f"No \"word_count\" in {ALIGNMENT_FILE.name} metadata for "
+              f"{', '.join(missing)}; add the key so it can be kept up to date")
+    if check:
+        for path in stale:
+            print(f"Out of date: {path.name}")
+        sys.exit(1 if stale or missing else 0)
+
+    for path, old, new in outputs:
+        if old != new:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(new)
+
+    for sig, stats in analysis.items():
+        print(f"  [{sig}] {stats['name']:<20} {stats['word_count']:>5} words, "
+              f"{stats['page_count']} pages, {stats['footnote_lines']} footnote lines")
+    if stale:
+        print(f"Updated {', '.join(path.name for path in stale)}")
+    elif not missing:
+        print("Already up to date.")
+    if missing:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+King Follett Discourse - Spreadsheet Export
+Exports the synoptic table (sections x witnesses) and the critical apparatus
+to an .xlsx workbook that imports directly into Google Sheets.
+
+Rows are streamed straight into the zip entries of the workbook, with inline
+strings instead of a shared string table, so memory use stays constant no
+matter how many rows are written. Only the standard library is needed.
+
+Sheets:
+    Synoptic    Section | Label | <one column per witness>
+    Apparatus   ID | Section | Type | Flag | Lemma | <one column per witness> |
+                Apparatus | Note | Verification
+
+Witness columns follow the alignment map metadata (W | B | R | C today).
+
+Usage:
+    python export_sheet.py                      # data/king-follett-critical-edition.xlsx
+    python export_sheet.py --out edition.xlsx
+"""
+
+import re
+import sys
+import zipfile
+from xml.sax.saxutils import escape
+
+from align import (
+    DATA_DIR,
+    compute_segments,
+    load_alignment,
+    load_collation,
+    load_witnesses,
+)
+
+DEFAULT_OUTPUT = DATA_DIR / "king-follett-critical-edition.xlsx"
+
+# Characters XML 1.0 does not allow, even escaped
+_ILLEGAL_XML_RE = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+STYLE_HEADER = 1  # bold
+STYLE_WRAP = 2    # wrapped, top-aligned
+ROWS_PER_WRITE = 500  # rows buffered per write to the zip stream
+
+_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>
+{overrides}
+</Types>"""
+
+_ROOT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>
+</Relationships>"""
+
+_WORKBOOK = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+<sheets>{sheets}</sheets>
+</workbook>"""
+
+_WORKBOOK_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+{relationships}
+<Relationship Id="rIdStyles" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>
+</Relationships>"""
+
+_STYLES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<fonts count="2"><font><sz val="11"/><name val="Georgia"/></font><font><b/><sz val="11"/><name val="Georgia"/></font></fonts>
+<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>
+<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>
+<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>
+<cellXfs count="3">
+<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>
+<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>
+<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0" applyAlignment="1"><alignment wrapText="1" vertical="top"/></xf>
+</cellXfs>
+</styleSheet>"""
+
+_SHEET_HEAD = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/></sheetView></sheetViews>
+<cols>{cols}</cols>
+<sheetData>"""
+
+_SHEET_TAIL = "</sheetData>\n</worksheet>"
+
+
+def _column_letter(index: int) -> str:
+    """0 -> A, 25 -> Z, 26 -> AA."""
+    letters = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _cell(ref: str, value, style: int) -> str:
+    if value is None or value == "":
+        return f'<c r="{ref}" s="{style}"/>'
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c r="{ref}" s="{style}"><v>{value}</v></c>'
+    text = escape(_ILLEGAL_XML_RE.sub("", str(value)))
+    return (f'<c r="{ref}" s="{style}" t="inlineStr">'
+            f'<is><t xml:space="preserve">{text}</t></is></c>')
+
+
+def _row_xml(row_num: int, values, style: int, letters) -> str:
+    cells = "".join(
+        _cell(f"{letter}{row_num}", value, style)
+        for letter, value in zip(letters, values)
+    )
+    return f'<row r="{row_num}">{cells}</row>'
+
+
+class StreamingWorkbook:
+    """Write-only .xlsx writer: each sheet is streamed row by row to disk.
+
+    Sheets are written one at a time (add_sheet consumes its rows before
+    returning); the workbook parts that list the sheets are written on close.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.sheets = []
+        self.zip = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED)
+
+    def add_sheet(self, name, header, rows, widths=None):
+        """Write a sheet from a header and an iterable of row sequences.
+        Returns the number of data rows written."""
+        index = len(self.sheets) + 1
+        self.sheets.append(name)
+        widths = widths or [20] * len(header)
+        cols = "".join(
+            f'<col min="{i}" max="{i}" width="{w}" customWidth="1"/>'
+            for i, w in enumerate(widths, start=1)
+        )
+
+        letters = [_column_letter(i) for i in range(len(header))]
+
+        count = 0
+        with self.zip.open(f"xl/worksheets/sheet{index}.xml", "w") as f:
+            buffer = [_SHEET_HEAD.format(cols=cols),
+                      _row_xml(1, header, STYLE_HEADER, letters)]
+            for count, row in enumerate(rows, start=1):
+                buffer.append(_row_xml(count + 1, row, STYLE_WRAP, letters))
+                if len(buffer) >= ROWS_PER_WRITE:
+                    f.write("".join(buffer).encode("utf-8"))
+                    buffer.clear()
+            buffer.append(_SHEET_TAIL)
+            f.write("".join(buffer).encode("utf-8"))
+        return count
+
+    def close(self):
+        overrides = "\n".join(
+            f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+            f'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for i in range(1, len(self.sheets) + 1)
+        )
+        sheets = "".join(
+            f'<sheet name="{escape(name, {chr(34): "&quot;"})}" sheetId="{i}" r:id="rId{i}"/>'
+            for i, name in enumerate(self.sheets, start=1)
+        )
+        relationships = "\n".join(
+            f'<Relationship Id="rId{i}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet{i}.xml"/>'
+            for i in range(1, len(self.sheets) + 1)
+        )
+        self.zip.writestr("[Content_Types].xml", _CONTENT_TYPES.format(overrides=overrides))
+        self.zip.writestr("_rels/.rels", _ROOT_RELS)
+        self.zip.writestr("xl/workbook.xml", _WORKBOOK.format(sheets=sheets))
+        self.zip.writestr("xl/_rels/workbook.xml.rels",
+                          _WORKBOOK_RELS.format(relationships=relationships))
+        self.zip.writestr("xl/styles.xml", _STYLES)
+        self.zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def format_apparatus(variant: dict, sigla) -> str:
+    """Render a variant as an apparatus line.
+
+    Witnesses agreeing with the lemma follow the bracket; the rest give
+    their reading then siglum, e.g. "lemma ] B W; other reading C; om. R."
+    """
+    readings = variant.get("witnesses", {})
+    lemma = variant.get("lemma", "")
+    agreeing = [sig for sig in sigla if readings.get(sig) == lemma]
+    others = []
+    for sig in sigla:
+        reading = readings.get(sig)
+        if reading is None or sig in agreeing:
+            continue
+        if reading.strip().lower().startswith("om."):
+            others.append(f"om. {sig}")
+        else:
+            others.append(f"{reading} {sig}")
+    return f"{lemma} ] {' '.join(agreeing)}".rstrip() + "".join(f"; {o}" for o in others) + "."
+
+
+def synoptic_rows(alignment, segments, sigla):
+    for section in alignment["sections"]:
+        yield [section["id"], section["label"]] + [
+            segments[(section["id"], sig)] for sig in sigla
+        ]
+
+
+def apparatus_rows(collation, sigla):
+    for v in collation["variants"]:
+        readings = v.get("witnesses", {})
+        yield ([v["id"], v["section"], v.get("type", ""), v.get("flag", ""),
+                v.get("lemma", "")]
+               + [readings.get(sig, "") for sig in sigla]
+               + [format_apparatus(v, sigla), v.get("note", ""),
+                  v.get("verification", "")])
+
+
+def export_workbook(path=DEFAULT_OUTPUT):
+    alignment = load_alignment()
+    collation = load_collation()
+    witnesses = load_witnesses(alignment)
+    sigla = list(witnesses)
+
+    with StreamingWorkbook(path) as book:
+        sections = book.add_sheet(
+            "Synoptic",
+            ["Section", "Label"] + sigla,
+            synoptic_rows(alignment, compute_segments(alignment, witnesses), sigla),
+            widths=[9, 30] + [60] * len(sigla),
+        )
+        variants = book.add_sheet(
+            "Apparatus",
+            ["ID", "Section", "Type", "Flag", "Lemma"] + sigla
+            + ["Apparatus", "Note", "Verification"],
+            apparatus_rows(collation, sigla),
+            widths=[7, 9, 14, 8, 35] + [35] * len(sigla) + [60, 60, 12],
+        )
+    print(f"Exported {sections} sections and {variants} variants to {path}")
+
+
+def main():
+    args = sys.argv[1:]
+    if "--help" in args:
+        print(__doc__)
+        return
+    path = DEFAULT_OUTPUT
+    if "--out" in args:
+        i = args.index("--out")
+        if i + 1 < len(args):
+            path = args[i + 1]
+    export_workbook(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""
+King Follett Discourse - Base Text Reconstruction
+Builds data/base_text.md, the reconstructed lemma, by choosing a reading at
+every aligned token position of each section from the collated witnesses.
+
+Per section, every witness's normalized text is aligned word by word to a
+pivot witness (the base text, or the heaviest witness with text there). At
+each pivot position, and in each gap between positions where some witness
+has extra words, the candidate readings are weighted by witness; a reading
+is chosen if its weight exceeds the majority share of the witnesses present,
+otherwise the fallback rule applies. Each critical variant in
+collation_map.json is resolved the same way at phrase level.
+
+A witness whose passage was cut off because its end marker was not found
+(align.TruncatedPassage) only votes on the positions its text reaches: what
+follows the cut is no evidence either way, not an omission. Its last word,
+which may be cut mid-word, is dropped, and it is only used as pivot when no
+witness has the whole passage.
+
+Settings live in data/reconstruction.json:
+    weights     siglum -> weight (missing witnesses weigh 1.0)
+    majority    share of the present witnesses' weight a reading must exceed
+    fallback    "pivot" (keep the pivot's reading) or "plurality" (heaviest
+                reading wins even without a majority)
+
+Sections are cached by a hash of exactly what they depend on (their id and
+label, their witness texts, the witness order used for tie-breaks, the
+weights of the witnesses present, the rules and their variants),
+so changing one weight or one variant only recomputes the affected sections.
+
+Usage:
+    python reconstruct.py                    # Write data/base_text.md
+    python reconstruct.py --weight R=0.5     # Override a weight for this run
+    python reconstruct.py --no-cache         # Recompute every section
+"""
+
+import hashlib
+import json
+import re
+import sys
+from difflib import SequenceMatcher
+
+from align import (
+    DATA_DIR,
+    TruncatedPassage,
+    compute_segments,
+    load_alignment,
+    load_collation,
+    load_witnesses,
+)
+
+CONFIG_FILE = DATA_DIR / "reconstruction.json"
+CACHE_FILE = DATA_DIR / "reconstruction_cache.json"
+OUTPUT_FILE = DATA_DIR / "base_text.md"
+
+# Bump when the reconstruction or its rendering changes, to invalidate caches
+CACHE_VERSION = 1
+
+DEFAULT_CONFIG = {"weights": {}, "majority": 0.5, "fallback": "pivot"}
+
+
+def load_config(overrides=None) -> dict:
+    """Load reconstruction.json, applying per-run weight overrides."""
+    config = dict(DEFAULT_CONFIG)
+    try:
+        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+            config.update(json.load(f))
+    except FileNotFoundError:
+        pass
+    config["weights"] = {**config["weights"], **(overrides or {})}
+    if config["fallback"] not in ("pivot", "plurality"):
+        raise ValueError(f"Unknown fallback rule {config['fallback']!r}")
+    return config
+
+
+def has_text(text: str) -> bool:
+    """False for the placeholders get_section_text returns instead of text."""
+    return bool(text) and not text.startswith("[")
+
+
+def evidence_words(text: str) -> list:
+    """Words of a section text that are actual evidence for the witness."""
+    if not isinstance(text, TruncatedPassage):
+        return text.split()
+    chunk = text[:-len("...")]
+    words = chunk.split()
+    if chunk and not chunk[-1].isspace():
+        words = words[:-1]  # the cut may fall inside this word
+    return words
+
+
+def word_key(token: str) -> str:
+    """Comparison form of a token: lowercase, punctuation dropped, & -> and."""
+    if token == "&":
+        return "and"
+    return re.sub(r"[^\w]", "", token.lower())
+
+
+def choose(candidates, total, config, default):
+    """Pick among {key: (weight, surface, supporters)} by the majority rules.
+
+    Returns (key, rule) where rule is "majority", "plurality" or "fallback".
+    """
+    key, (weight, _, _) = max(candidates.items(), key=lambda kv: kv[1][0])
+    if weight > config["majority"] * total:
+        return key, "majority"
+    if config["fallback"] == "plurality":
+        return key, "plurality"
+    return default, "fallback"
+
+
+def _vote(candidates, key, surface, sig, weight):
+    prior = candidates.get(key)
+    if prior is None:
+        candidates[key] = (weight, surface, [sig])
+    else:
+        candidates[key] = (prior[0] + weight, prior[1], prior[2] + [sig])
+
+
+def reconstruct_section(texts: dict, order, pivot, config) -> list:
+    """Reconstruct one section from {siglum: text} of the witnesses present.
+
+    Returns a list of units (surface text, supporters, rule) in reading order.
+    """
+    weights = {sig: config["weights"].get(sig, 1.0) for sig in texts}
+    base = evidence_words(texts[pivot])
+    base_keys = [word_key(t) for t in base]
+
+    # slots[i]: words replacing pivot word i, per witness (None = omitted)
+    # gaps[i]: extra words each witness has before pivot word i (i == len -> end)
+    slots = [{pivot: base[i]} for i in range(len(base))]
+    gaps = [{} for _ in range(len(base) + 1)]
+    # reach[sig]: the witness has evidence for slots and gaps before this index
+    complete = len(base) + 1
+    reach = {sig: len(base) if isinstance(texts[sig], TruncatedPassage) else complete
+             for sig in texts}
+    for sig in order:
+        if sig == pivot or sig not in texts:
+            continue
+        words = evidence_words(texts[sig])
+        keys = [word_key(t) for t in words]
+        matcher = SequenceMatcher(None, base_keys, keys, autojunk=False)
+        opcodes = matcher.get_opcodes()
+        if reach[sig] < complete and opcodes and opcodes[-1][0] == "delete":
+            # Pivot words after the cut: unknown, not omitted
+            reach[sig] = opcodes[-1][1]
+            opcodes = opcodes[:-1]
+        for tag, i1, i2, j1, j2 in opcodes:
+            paired = min(i2 - i1, j2 - j1) if tag in ("equal", "replace") else 0
+            for k in range(paired):
+                slots[i1 + k][sig] = words[j1 + k]
+            for i in range(i1 + paired, i2):
+                slots[i][sig] = None
+            if j1 + paired < j2:
+                gaps[i1 + paired].setdefault(sig, []).extend(words[j1 + paired:j2])
+
+    units = []
+    for i in range(len(base) + 1):
+        voters = [sig for sig in order if sig in texts and i < reach[sig]]
+        total = sum(weights[sig] for sig in voters)
+        # Extra words: the empty reading is supported by everyone without any
+        candidates = {}
+        for sig in voters:
+            extra = gaps[i].get(sig, [])
+            key = tuple(word_key(t) for t in extra)
+            _vote(candidates, key, " ".join(extra), sig, weights[sig])
+        if len(candidates) > 1 or (candidates and () not in candidates):
+            key, rule = choose(candidates, total, config, default=())
+            if key:
+                _, surface, supporters = candidates[key]
+                units.append((surface, supporters, rule))
+
+        if i == len(base):
+            break
+        candidates = {}
+        for sig in voters:
+            word = slots[i].get(sig)
+            key = word_key(word) if word is not None else None
+            _vote(candidates, key, word, sig, weights[sig])
+        key, rule = choose(candidates, total, config, default=base_keys[i])
+        _, surface, supporters = candidates[key]
+        if key is not None:
+            units.append((surface, supporters, rule))
+    return units
+
+
+def resolve_variant(variant: dict, order, config):
+    """Choose a variant's reading at phrase level: (reading, supporters, rule)."""
+    candidates = {}
+    total = 0.0
+    readings = variant.get("witnesses", {})
+    for sig in order:
+        if sig not in readings:
+            continue
+        reading = readings[sig]
+        weight = config["weights"].get(sig, 1.0)
+        total += weight
+        omitted = reading.strip().lower().startswith("om.")
+        key = None if omitted else " ".join(word_key(t) for t in reading.split())
+        _vote(candidates, key, "om." if omitted else reading, sig, weight)
+    if not candidates:
+        return variant.get("lemma", ""), [], "fallback"
+    lemma_key = " ".join(word_key(t) for t in variant.get("lemma", "").split())
+    key, rule = choose(candidates, total, config, default=lemma_key)
+    if key in candidates:
+        _, reading, supporters = candidates[key]
+    else:
+        reading, supporters = variant.get("lemma", ""), []
+    return reading, supporters, rule
+
+
+def _merge_runs(units):
+    """Group consecutive units with the same supporters and rule."""
+    runs = []
+    for surface, supporters, rule in units:
+        if runs and runs[-1][1] == supporters and runs[-1][2] == rule:
+            runs[-1][0].append(surface)
+        else:
+            runs.append(([surface], supporters, rule))
+    return [(" ".join(words), supporters, rule) for words, supporters, rule in runs]
+
+
+def render_section(section, texts, order, pivot, variants, config) -> str:
+    """Render one section of base_text.md: text, source trail, variants."""
+    lines = [f"## {section['id']}: {section['label']}", ""]
+    if not texts:
+        lines += ["*No witness text is available for this section.*", ""]
+        return "\n".join(lines)
+
+    units = reconstruct_section(texts, order, pivot, config)
+    lines += [" ".join(surface for surface, _, _ in units), ""]
+
+    all_present = len(texts)
+    cut = [sig for sig in texts if isinstance(texts[sig], TruncatedPassage)]
+    cut_note = f"; cut off: {' '.join(cut)}" if cut else ""
+    lines += [f"Source trail (pivot {pivot}; witnesses {' '.join(texts)}{cut_note}):", ""]
+    for surface, supporters, rule in _merge_runs(units):
+        if len(supporters) == all_present:
+            tag = "all"
+        else:
+            tag = " ".join(supporters) + ("" if rule == "majority" else f"; {rule}")
+        lines.append(f"- \"{surface}\" [{tag}]")
+    lines.append("")
+
+    if variants:
+        lines += ["Critical readings:", ""]
+        for v in variants:
+            reading, supporters, rule = resolve_variant(v, order, config)
+            tag = " ".join(supporters) or "lemma"
+            if rule != "majority":
+                tag += f"; {rule}"
+            lines.append(f"- {v['id']} ({v.get('type', '')}, {v.get('flag', '')}): "
+                         f"\"{reading}\" [{tag}]")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def section_key(section, texts, order, weights, config, variants, pivot) -> str:
+    """Hash of everything a section's rendering depends on."""
+    payload = {
+        "version": CACHE_VERSION,
+        "id": section["id"],
+        "label": section["label"],
+        "order": order,
+        "texts": texts,
+        "truncated": sorted(sig for sig in texts if isinstance(texts[sig], TruncatedPassage)),
+        "weights": weights,
+        "pivot": pivot,
+        "majority": config["majority"],
+        "fallback": config["fallback"],
+        "variants": variants,
+    }
+    blob = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha1(blob).hexdigest()
+
+
+def load_cache() -> dict:
+    try:
+        with open(CACHE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def reconstruct(config, use_cache=True):
+    """Reconstruct every section; returns (markdown, recomputed, cached)."""
+    alignment = load_alignment()
+    collation = load_collation()
+    witnesses = load_witnesses(alignment)
+    order = witnesses.display_order()
+    segments = compute_segments(alignment, witnesses)
+
+    by_section = {}
+    for v in collation["variants"]:
+        by_section.setdefault(v["section"], []).append(v)
+
+    cache = load_cache() if use_cache else {}
+    new_cache = {}
+    recomputed = cached = 0
+    chunks = [
+        "# King Follett Discourse — Reconstructed Base Text",
+        "",
+        "Generated by data/reconstruct.py from the aligned witnesses "
+        f"({', '.join(f'{sig} = {witnesses.name(sig)}' for sig in order)}).",
+        "Weights: " + ", ".join(f"{sig} {config['weights'].get(sig, 1.0):g}" for sig in order)
+        + f"; a reading needs more than {config['majority']:g} of the present "
+        f"witnesses' weight, otherwise fallback = {config['fallback']}.",
+        "Source trail tags list the witnesses supporting each run of text "
+        "(\"all\" = unanimous).",
+        "",
+    ]
+
+    for section in alignment["sections"]:
+        sid = section["id"]
+        texts = {sig: segments[(sid, sig)] for sig in order
+                 if has_text(segments[(sid, sig)])}
+        # Weights of the witnesses this section's output can depend on
+        voters = set(texts).union(*(v.get("witnesses", {}) for v in by_section.get(sid, [])))
+        weights = {sig: config["weights"].get(sig, 1.0) for sig in order if sig in voters}
+        pivot = None
+        if texts:
+            # Prefer a witness whose whole passage was found
+            whole = [sig for sig in texts if not isinstance(texts[sig], TruncatedPassage)]
+            pivots = whole or list(texts)
+            pivot = (witnesses.base_text if witnesses.base_text in pivots
+                     else max(pivots, key=lambda sig: weights[sig]))
+        variants = by_section.get(sid, [])
+
+        key = section_key(section, texts, order, weights, config, variants, pivot)
+        entry = cache.get(sid)
+        if entry and entry["key"] == key:
+            rendered = entry["markdown"]
+            cached += 1
+        else:
+            rendered = render_section(section, texts, order, pivot, variants, config)
+            recomputed += 1
+        new_cache[sid] = {"key": key, "markdown": rendered}
+        chunks.append(rendered)
+
+    with open(CACHE_FILE, "w", encoding="utf-8") as f:
+        json.dump(new_cache, f, ensure_ascii=False)
+    return "\n".join(chunks), recomputed, cached
+
+
+def main():
+    args = sys.argv[1:]
+    if "--help" in args:
+        print(__doc__)
+        return
+    overrides = {}
+    for i, arg in enumerate(args):
+        if arg == "--weight" and i + 1 < len(args):
+            sig, _, value = args[i + 1].partition("=")
+            overrides[sig.upper()] = float(value)
+
+    config = load_config(overrides)
+    markdown, recomputed, cached = reconstruct(config, use_cache="--no-cache" not in args)
+    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
+        f.write(markdown)
+    print(f"Wrote {OUTPUT_FILE.name}: {recomputed} section(s) recomputed, "
+          f"{cached} from cache")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+King Follett Discourse - Local Query Server
+Read-only JSON API over the edition data. The alignment map, collation map
+and normalized section text of every witness are loaded once at startup;
+rendered responses are kept in an in-memory LRU and carry an ETag so clients
+can revalidate with If-None-Match.
+
+Endpoints (GET or HEAD):
+    /sections                         Section ids, labels and summaries
+    /sections/S08                     One section with every witness's text
+    /variants?section=S08&flag=high&type=theological
+                                      Apparatus entries (all filters optional)
+    /compare/S08?a=B&b=W              Word-level comparison of two witnesses
+                                      (a defaults to the base text, b to the
+                                      next witness), plus the section's variants
+
+Usage:
+    python serve.py [--host 127.0.0.1] [--port 8765]
+"""
+
+import asyncio
+import difflib
+import hashlib
+import json
+import re
+import sys
+from functools import lru_cache
+from urllib.parse import parse_qsl, urlsplit
+
+from align import (
+    compute_segments,
+    load_alignment,
+    load_collation,
+    load_witnesses,
+)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+CACHE_SIZE = 512  # rendered responses kept in memory
+
+# One entity tag in an If-None-Match list: optional weak prefix, quoted opaque tag
+_ETAG_RE = re.compile(r'(?:W/)?("[^"]*")')
+
+STATUS_TEXT = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+}
+
+
+class NotFound(Exception):
+    pass
+
+
+class BadRequest(Exception):
+    pass
+
+
+class Edition:
+    """The edition data, loaded once and shared by every request."""
+
+    def __init__(self):
+        self.alignment = load_alignment()
+        self.collation = load_collation()
+        self.witnesses = load_witnesses(self.alignment)
+        self.sections = {s["id"]: s for s in self.alignment["sections"]}
+        # (section id, siglum) -> normalized section text
+        self.texts = compute_segments(self.alignment, self.witnesses)
+
+    def section(self, section_id):
+        try:
+            return self.sections[section_id]
+        except KeyError:
+            raise NotFound(f"Section {section_id} not found") from None
+
+    def list_sections(self):
+        return [
+            {"id": s["id"], "label": s["label"], "summary": s["summary"]}
+            for s in self.alignment["sections"]
+        ]
+
+    def get_section(self, section_id):
+        section = self.section(section_id)
+        return {
+            "id": section["id"],
+            "label": section["label"],
+            "summary": section["summary"],
+            "witnesses": {
+                sig: {
+                    "name": self.witnesses.name(sig),
+                    "present": section.get(sig, {}).get("present") is not False,
+                    "pages": section.get(sig, {}).get("pages", []),
+                    "text": self.texts[(section_id, sig)],
+                }
+                for sig in self.witnesses
+            },
+        }
+
+    def find_variants(self, section=None, flag=None, type=None):
+        return [
+            v for v in self.collation["variants"]
+            if (section is None or v["section"] == section)
+            and (flag is None or v.get("flag") == flag)
+            and (type is None or v.get("type") == type)
+        ]
+
+    def compare(self, section_id, a=None, b=None):
+        self.section(section_id)
+        order = self.witnesses.display_order()
+        a = a or order[0]
+        b = b or next((sig for sig in order if sig != a), a)
+        for sig in (a, b):
+            if sig not in self.witnesses:
+                raise BadRequest(f"Unknown witness {sig!r}")
+        if a == b:
+            raise BadRequest("Compare two different witnesses")
+
+        words_a = self.texts[(section_id, a)].split()
+        words_b = self.texts[(section_id, b)].split()
+        matcher = difflib.SequenceMatcher(None, words_a, words_b, autojunk=False)
+        ops = [
+            {"op": tag, a: " ".join(words_a[i1:i2]), b: " ".join(words_b[j1:j2])}
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        ]
+        return {
+            "section": section_id,
+            "witnesses": [a, b],
+            "similarity": round(matcher.ratio(), 4),
+            "diff": ops,
+            "variants": self.find_variants(section=section_id),
+        }
+
+
+class Router:
+    """Maps request targets to cached, pre-encoded JSON responses."""
+
+    def __init__(self, edition):
+        self.edition = edition
+        self.render = lru_cache(maxsize=CACHE_SIZE)(self._render)
+
+    def _render(self, path, query):
+        """Render one response as (status, body bytes, etag)."""
+        params = dict(query)
+        parts = [p for p in path.split("/") if p]
+        try:
+            if parts == ["sections"]:
+                data = self.edition.list_sections()
+            elif len(parts) == 2 and parts[0] == "sections":
+                data = self.edition.get_section(parts[1].upper())
+            elif parts == ["variants"]:
+                data = self.edition.find_variants(
+                    section=params.get("section", "").upper() or None,
+                    flag=params.get("flag"),
+                    type=params.get("type"),
+                )
+            elif len(parts) == 2 and parts[0] == "compare":
+                data = self.edition.compare(
+                    parts[1].upper(),
+                    params.get("a", "").upper() or None,
+                    params.get("b", "").upper() or None,
+                )
+            else:
+                raise NotFound(f"No route for {path}")
+            status = 200
+        except NotFound as e:
+            status, data = 404, {"error": str(e)}
+        except BadRequest as e:
+            status, data = 400, {"error": str(e)}
+
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()[:16]
+        return status, body, etag
+
+    def respond(self, target):
+        url = urlsplit(target)
+        query = tuple(sorted(parse_qsl(url.query)))
+        return self.render(url.path, query)
+
+
+def etag_matches(if_none_match, etag):
+    """True if an If-None-Match header value matches etag (RFC 9110 13.1.2):
+    "*" matches any current representation, otherwise weak comparison
+    against each tag in the comma-separated list."""
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in _ETAG_RE.findall(if_none_match)
+
+
+def _format_response(status, headers, body=b""):
+    lines = [f"HTTP/1.1 {status} {STATUS_TEXT[status]}"]
+    lines += [f"{name}: {value}" for name, value in headers]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+async def handle_connection(router, reader, writer):
+    """Serve requests on one connection until the client closes it."""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            try:
+                method, target, version = request_line.decode("latin-1").split()
+            except ValueError:
+                writer.write(_format_response(400, [("Connection", "close"),
+                                                    ("Content-Length", "0")]))
+                break
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            keep_alive = (version == "HTTP/1.1"
+                          and headers.get("connection", "").lower() != "close")
+
+            if method not in ("GET", "HEAD"):
+                # Request bodies are never read, so the connection can't be reused
+                writer.write(_format_response(405, [("Allow", "GET, HEAD"),
+                                                    ("Connection", "close"),
+                                                    ("Content-Length", "0")]))
+                break
+
+            status, body, etag = router.respond(target)
+            response_headers = [("ETag", etag), ("Cache-Control", "no-cache")]
+            if status == 200 and etag_matches(headers.get("if-none-match"), etag):
+                status, body = 304, b""
+            else:
+                response_headers.append(("Content-Type", "application/json; charset=utf-8"))
+            response_headers.append(("Content-Length", str(len(body))))
+            if not keep_alive:
+                response_headers.append(("Connection", "close"))
+
+            writer.write(_format_response(status, response_headers,
+                                          b"" if method == "HEAD" else body))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    router = Router(Edition())
+    server = await asyncio.start_server(
+        lambda r, w: handle_connection(router, r, w), host, port
+    )
+    print(f"Serving edition data on http://{host}:{port}/ (Ctrl-C to stop)")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    args = sys.argv[1:]
+    if "--help" in args:
+        print(__doc__)
+        return
+    host, port = DEFAULT_HOST, DEFAULT_PORT
+    for i, arg in enumerate(args):
+        if arg == "--host" and i + 1 < len(args):
+            host = args[i + 1]
+        elif arg == "--port" and i + 1 < len(args):
+            port = int(args[i + 1])
+    try:
+        asyncio.run(serve(host, port))
+    except KeyboardInterrupt:
+        print("\nStopped.")
+
+
+if __name__ == "__main__":
+    main()
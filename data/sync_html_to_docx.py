@@ -3,12 +3,18 @@
 sync_html_to_docx.py — Append sections VII, VIII, IX from the HTML edition
 to the existing DOCX (which contains sections I–VI).
 
-Uses python-docx and lxml. Preserves existing formatting conventions:
+Uses python-docx and lxml, imported only once a command needs them so that
+--help (and modules that import this one) start instantly. Preserves
+existing formatting conventions:
   - Heading 1 for major sections (h2)
   - Heading 2 for subsections (h3)
   - Normal style (Georgia 11pt) for body text
   - Tables with header row
   - Hyperlinks via OxmlElement
+
+Usage:
+    python sync_html_to_docx.py          # Append VII-IX to the DOCX
+    python sync_html_to_docx.py --help   # Show this message
 """
 
 import copy
@@ -16,13 +22,10 @@ import html
 import os
 import re
 import shutil
+import sys
 
-from docx import Document
-from docx.oxml import OxmlElement
-from docx.oxml.ns import qn, nsdecls
-from docx.shared import Pt, Emu, RGBColor
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from lxml import etree
+# Heavy dependencies, bound by _load_dependencies() on first use
+Document = OxmlElement = qn = Pt = etree = None
 
 
 # ── Paths ────────────────────────────────────────────────────────────────
@@ -32,10 +35,23 @@ HTML_PATH = os.path.join(SCRIPT_DIR, "..", "docs", "index.html")
 BACKUP_PATH = DOCX_PATH + ".bak"
 
 
+def _load_dependencies():
+    """Import python-docx and lxml into module globals on first call."""
+    global Document, OxmlElement, qn, Pt, etree
+    if Document is not None:
+        return
+    from docx import Document
+    from docx.oxml import OxmlElement
+    from docx.oxml.ns import qn
+    from docx.shared import Pt
+    from lxml import etree
+
+
 # ── HTML parsing helpers ─────────────────────────────────────────────────
 
 def load_html():
     """Load and parse the HTML file."""
+    _load_dependencies()
     with open(HTML_PATH, "r", encoding="utf-8") as f:
         content = f.read()
     # Extract just the <main> content to avoid parsing JS/CSS issues
@@ -83,11 +99,11 @@ def find_sections_vii_to_ix(tree):
 
 # ── DOCX formatting helpers ──────────────────────────────────────────────
 
-def set_run_font(run, name="Georgia", size=Pt(11), bold=None, italic=None,
+def set_run_font(run, name="Georgia", size=None, bold=None, italic=None,
                  color=None):
-    """Set font properties on a run."""
+    """Set font properties on a run (size defaults to 11pt)."""
     run.font.name = name
-    run.font.size = size
+    run.font.size = size or Pt(11)
     if bold is not None:
         run.bold = bold
     if italic is not None:
@@ -97,8 +113,9 @@ def set_run_font(run, name="Georgia", size=Pt(11), bold=None, italic=None,
 
 
 def add_hyperlink(paragraph, url, text, font_name="Georgia",
-                  font_size=Pt(11)):
+                  font_size=None):
     """Add a clickable hyperlink to a paragraph using OxmlElement."""
+    font_size = font_size or Pt(11)
     part = paragraph.part
     r_id = part.relate_to(
         url,
@@ -160,11 +177,12 @@ def get_element_text(el):
 
 # ── Inline content rendering ────────────────────────────────────────────
 
-def render_inline(paragraph, el, font_size=Pt(11)):
+def render_inline(paragraph, el, font_size=None):
     """
     Recursively render inline HTML content into a Word paragraph.
     Handles <b>, <i>, <a>, and plain text.
     """
+    font_size = font_size or Pt(11)
     # Process element's own text
     if el.text:
         text = decode_entities(el.text)
@@ -302,7 +320,7 @@ def add_heading_2(doc, text):
     return p
 
 
-def add_body_paragraph(doc, el, font_size=Pt(11)):
+def add_body_paragraph(doc, el, font_size=None):
     """Add a Normal-style paragraph with inline formatting from HTML element."""
     p = doc.add_paragraph()
     p.style = doc.styles["Normal"]
@@ -464,7 +482,24 @@ def process_elements(doc, elements):
         # Skip script, style, hr, div etc.
 
 
+def build_docx(elements, base_path=BACKUP_PATH, out_path=DOCX_PATH):
+    """Rebuild the DOCX from a sections I–VI base document plus the given
+    HTML elements. Unlike main(), this never touches the backup, so it can be
+    run repeatedly (watch mode). Returns True if the colophon was preserved."""
+    _load_dependencies()
+    doc = Document(base_path)
+    colophon_xml = remove_colophon(doc)
+    process_elements(doc, elements)
+    re_add_colophon(doc, colophon_xml)
+    doc.save(out_path)
+    return colophon_xml is not None
+
+
 def main():
+    if "--help" in sys.argv[1:]:
+        print(__doc__)
+        return
+
     print("Loading HTML...")
     tree = load_html()
 
@@ -0,0 +1,240 @@
+"""
+King Follett Discourse - Collation Validator
+Cross-checks collation_map.json against the transcripts: every witness
+reading must occur (fuzzily) in that witness's text for the variant's
+section, and every "om." reading must really be absent there.
+
+Each section/witness text (align.compute_segments) is tokenized once into a
+token index; readings are then located by anchoring on their rarest tokens
+and scoring only the candidate windows, so checking is roughly linear in the
+number of variants.
+
+Usage:
+    python validate_collation.py                # Report mismatches (exit 1 if any)
+    python validate_collation.py --verbose      # Also list matched/unverifiable readings
+    python validate_collation.py --json         # Machine-readable report
+    python validate_collation.py --threshold 0.7
+"""
+
+import json
+import re
+import sys
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+from align import (
+    TruncatedPassage,
+    compute_segments,
+    load_alignment,
+    load_collation,
+    load_witnesses,
+)
+
+# Fraction of a reading's tokens that must match, in order, inside one window
+DEFAULT_THRESHOLD = 0.6
+# Rarest reading tokens used to anchor candidate windows
+ANCHOR_TOKENS = 3
+# Statuses that mean the reading could not be checked, not that it is wrong
+UNVERIFIABLE = {
+    "unresolved-section": "alignment markers not found",
+    "truncated-section": "end marker not found, text cut off",
+}
+
+_TOKEN_RE = re.compile(r"\w+|&")
+
+
+def tokenize(text: str):
+    """Return (tokens, spans): lowercased word tokens and their char offsets."""
+    tokens, spans = [], []
+    for m in _TOKEN_RE.finditer(text):
+        word = m.group().lower()
+        tokens.append("and" if word == "&" else word)
+        spans.append(m.span())
+    return tokens, spans
+
+
+def is_omission(reading: str) -> bool:
+    return reading.strip().lower().startswith("om.")
+
+
+class SectionIndex:
+    """Token index over one witness's text for one section."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.omitted = text.startswith("[om.")
+        # The alignment map's markers for this section could not be located
+        self.unresolved = text.startswith("[MARKER NOT FOUND")
+        # Only the start of the passage is known (see align.find_passage)
+        self.truncated = isinstance(text, TruncatedPassage)
+        self.tokens, self.spans = tokenize(text)
+        self.positions = defaultdict(list)
+        for i, token in enumerate(self.tokens):
+            self.positions[token].append(i)
+
+    def find(self, reading: str):
+        """Best fuzzy match of a reading: (score, char_start, char_end).
+
+        Score is the fraction of the reading's tokens matched in order within
+        a window of about the reading's length; (0.0, None, None) if no
+        reading token occurs in the text at all.
+        """
+        needle, _ = tokenize(reading)
+        if not needle or self.omitted:
+            return 0.0, None, None
+
+        # Anchor on the rarest tokens of the reading that occur here
+        present = [(len(self.positions[t]), k, t) for k, t in enumerate(needle)
+                   if t in self.positions]
+        if not present:
+            return 0.0, None, None
+        anchors = sorted(present)[:ANCHOR_TOKENS]
+
+        span = len(needle) + len(needle) // 4 + 1
+        starts = {max(0, pos - k) for _, k, t in anchors
+                  for pos in self.positions[t]}
+
+        best = (0.0, None, None)
+        for start in sorted(starts):
+            window = self.tokens[start:start + span]
+            matcher = SequenceMatcher(None, needle, window, autojunk=False)
+            blocks = [b for b in matcher.get_matching_blocks() if b.size]
+            score = sum(b.size for b in blocks) / len(needle)
+            if score > best[0]:
+                first = start + blocks[0].b
+                last = start + blocks[-1].b + blocks[-1].size - 1
+                best = (score, self.spans[first][0], self.spans[last][1])
+        return best
+
+
+def build_indexes(alignment, witnesses):
+    """Index every section/witness text once: (section id, siglum) -> index."""
+    segments = compute_segments(alignment, witnesses)
+    return {key: SectionIndex(text) for key, text in segments.items()}
+
+
+def validate(alignment, collation, threshold=DEFAULT_THRESHOLD):
+    """Check every reading; returns a list of result dicts."""
+    witnesses = load_witnesses(alignment)
+    sigla = list(witnesses)
+    indexes = build_indexes(alignment, witnesses)
+    sections = {s["id"] for s in alignment["sections"]}
+    results = []
+
+    for variant in collation["variants"]:
+        vid, sid = variant["id"], variant["section"]
+        if sid not in sections:
+            results.append({"variant": vid, "section": sid, "witness": None,
+                            "status": "unknown-section", "score": None,
+                            "offset": None, "match": None})
+            continue
+
+        readings = variant.get("witnesses", {})
+        for sig in sigla:
+            if sig not in readings:
+                continue
+            index = indexes[(sid, sig)]
+            reading = readings[sig]
+
+            if index.unresolved:
+                score, start, end = 0.0, None, None
+                status = "unresolved-section"
+            elif is_omission(reading):
+                # The passage must not be found: try the lemma and every
+                # other witness's reading against this witness's text
+                others = [variant.get("lemma", "")] + [
+                    r for s, r in readings.items() if s != sig and not is_omission(r)
+                ]
+                score, start, end = max(
+                    (index.find(r) for r in others if r),
+                    key=lambda m: m[0], default=(0.0, None, None),
+                )
+                if score >= threshold:
+                    status = "om-but-present"
+                elif index.truncated:
+                    # Absent from the cut-off chunk proves nothing
+                    status = "truncated-section"
+                else:
+                    status = "ok"
+            else:
+                score, start, end = index.find(reading)
+                if index.omitted:
+                    status = "section-omitted"
+                elif score >= threshold:
+                    status = "ok"
+                elif index.truncated:
+                    status = "truncated-section"
+                else:
+                    status = "not-found"
+
+            results.append({
+                "variant": vid,
+                "section": sid,
+                "witness": sig,
+                "status": status,
+                "score": round(score, 3),
+                "offset": [start, end] if start is not None else None,
+                "match": index.text[start:end] if start is not None else None,
+            })
+    return results
+
+
+def find_problems(results):
+    return [r for r in results
+            if r["status"] != "ok" and r["status"] not in UNVERIFIABLE]
+
+
+def print_report(results, verbose=False):
+    problems = find_problems(results)
+    unverified = [r for r in results if r["status"] in UNVERIFIABLE]
+    print("=" * 80)
+    print("COLLATION VALIDATION")
+    print("=" * 80)
+    for r in results:
+        if (r["status"] == "ok" or r["status"] in UNVERIFIABLE) and not verbose:
+            continue
+        where = f"{r['variant']} {r['section']}"
+        if r["witness"]:
+            where += f" [{r['witness']}]"
+        line = f"  {r['status']:<16} {where:<16}"
+        if r["score"] is not None:
+            line += f" score {r['score']:.2f}"
+        if r["offset"]:
+            line += f"  @{r['offset'][0]}-{r['offset'][1]}"
+        print(line)
+        if r["match"] and r["status"] != "ok":
+            print(f"      closest: {r['match'][:70]}")
+
+    print()
+    print(f"{len(results)} readings checked, {len(problems)} problem(s).")
+    for status, reason in UNVERIFIABLE.items():
+        skipped = [r for r in unverified if r["status"] == status]
+        if skipped:
+            sections = sorted({f"{r['section']} [{r['witness']}]" for r in skipped})
+            print(f"{len(skipped)} reading(s) unverifiable ({reason}): "
+                  f"{', '.join(sections)}")
+    return problems
+
+
+def main():
+    args = sys.argv[1:]
+    if "--help" in args:
+        print(__doc__)
+        return
+    threshold = DEFAULT_THRESHOLD
+    if "--threshold" in args:
+        i = args.index("--threshold")
+        if i + 1 < len(args):
+            threshold = float(args[i + 1])
+
+    results = validate(load_alignment(), load_collation(), threshold)
+    if "--json" in args:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+        problems = find_problems(results)
+    else:
+        problems = print_report(results, verbose="--verbose" in args)
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+King Follett Discourse - Watch Mode
+Keeps the parsed transcripts, normalized text and edition data in memory and
+incrementally rebuilds the derived artifacts whenever an input file changes.
+
+Dependency graph (input -> artifacts):
+    <witness>.md         -> data/segments/*_<siglum>.txt
+    alignment_map.json   -> data/segments/<section>_<siglum>.txt for each
+                            section/witness entry whose markers changed (all
+                            of a witness's segments if its metadata changed)
+    collation_map.json   -> in-memory apparatus (reloaded; changed variants
+                            are reported)
+    docs/index.html      -> king-follett-critical-edition.docx, only when
+                            sections VII-IX of the HTML actually changed
+
+Files are polled for changes; a burst of saves is debounced into one rebuild.
+
+Usage:
+    python align.py --watch
+    python watch.py [--interval 0.2] [--debounce 0.3]
+"""
+
+import os
+import sys
+import time
+
+from align import (
+    ALIGNMENT_FILE,
+    BASE_DIR,
+    COLLATION_FILE,
+    SEGMENTS_DIR,
+    LazyTranscripts,
+    get_section_text,
+    load_alignment,
+    load_collation,
+    load_transcript,
+    load_witnesses,
+    segment_path,
+)
+
+HTML_FILE = BASE_DIR / "docs" / "index.html"
+
+DEFAULT_INTERVAL = 0.2  # seconds between polls
+DEFAULT_DEBOUNCE = 0.3  # quiet period before rebuilding
+
+
+class EditionState:
+    """In-memory edition model and the artifacts derived from it."""
+
+    def __init__(self):
+        self.alignment = load_alignment()
+        self.collation = load_collation()
+        self.witnesses = load_witnesses(self.alignment)
+        self.transcripts = LazyTranscripts(self.witnesses)
+        # (section id, siglum) -> segment text last written to disk
+        self.segments = {}
+        # Serialized sections VII-IX of the HTML, or None if not yet read
+        self.docx_source = None
+        self.docx_enabled = True
+
+    # ── Inputs ───────────────────────────────────────────────────────────
+
+    def inputs(self):
+        """Map each watched file to the handler that reloads it."""
+        handlers = {
+            ALIGNMENT_FILE: self.reload_alignment,
+            COLLATION_FILE: self.reload_collation,
+            HTML_FILE: self.reload_html,
+        }
+        for sig in self.witnesses:
+            handlers[self.witnesses.path(sig)] = (
+                lambda sig=sig: self.reload_transcript(sig)
+            )
+        return handlers
+
+    def reload_transcript(self, siglum):
+        """Reload one transcript; every segment of that witness is affected."""
+        self.transcripts[siglum] = load_transcript(siglum, self.witnesses)
+        return {(s["id"], siglum) for s in self.alignment["sections"]}
+
+    def reload_alignment(self):
+        """Reload the alignment map; only changed section entries are affected."""
+        # Load and validate both before touching the state, so a half-edited
+        # map leaves the previous alignment and registry in place together
+        alignment = load_alignment()
+        witnesses = load_witnesses(alignment)
+
+        old = {s["id"]: s for s in self.alignment["sections"]}
+        old_witnesses = self.witnesses.entries
+        old_transcripts = self.transcripts
+        self.alignment = alignment
+        self.witnesses = witnesses
+
+        # Witnesses added, removed or pointed at another file
+        redone = {sig for sig in self.witnesses
+                  if old_witnesses.get(sig, {}).get("file") != self.witnesses.filename(sig)}
+        self.transcripts = LazyTranscripts(self.witnesses)
+        self.transcripts.update(
+            (sig, body) for sig, body in old_transcripts.items()
+            if sig in self.witnesses and sig not in redone
+        )
+
+        affected = set()
+        for section in self.alignment["sections"]:
+            before = old.get(section["id"], {})
+            for sig in self.witnesses:
+                if sig in redone or section.get(sig) != before.get(sig):
+                    affected.add((section["id"], sig))
+        return affected
+
+    def reload_collation(self):
+        """Reload the apparatus and report which variants changed."""
+        old = {v["id"]: v for v in self.collation["variants"]}
+        self.collation = load_collation()
+        new = {v["id"]: v for v in self.collation["variants"]}
+        changed = sorted(vid for vid in old.keys() | new.keys()
+                         if old.get(vid) != new.get(vid))
+        if changed:
+            print(f"  collation_map.json: {len(changed)} variant(s) changed: "
+                  f"{', '.join(changed)}")
+        return set()
+
+    def reload_html(self):
+        """Re-extract sections VII-IX and rebuild the DOCX if they changed."""
+        if not self.docx_enabled:
+            return set()
+        try:
+            from lxml import etree
+            import sync_html_to_docx as sync
+            sync._load_dependencies()
+        except ImportError as e:
+            print(f"  DOCX rebuild disabled: {e}")
+            self.docx_enabled = False
+            return set()
+
+        elements = sync.find_sections_vii_to_ix(sync.load_html())
+        source = b"".join(etree.tostring(el) for el in elements)
+        if self.docx_source is not None and source != self.docx_source:
+            sync.build_docx(elements)
+            print(f"  rebuilt {os.path.basename(sync.DOCX_PATH)}")
+        self.docx_source = source
+        return set()
+
+    # ── Artifacts ────────────────────────────────────────────────────────
+
+    def rebuild_segments(self, keys):
+        """Recompute the given segments, writing only those whose text changed."""
+        SEGMENTS_DIR.mkdir(exist_ok=True)
+        sections = {s["id"]: s for s in self.alignment["sections"]}
+        written = 0
+        for sid, sig in sorted(keys):
+            section = sections.get(sid)
+            if section is None:
+                continue
+            text = get_section_text(section, sig, self.transcripts)
+            if self.segments.get((sid, sig)) == text:
+                continue
+            path = segment_path(sid, sig)
+            if (sid, sig) not in self.segments and path.exists():
+                # First pass: compare against what is already on disk
+                with open(path, "r", encoding="utf-8") as f:
+                    if f.read() == text:
+                        self.segments[(sid, sig)] = text
+                        continue
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+            self.segments[(sid, sig)] = text
+            written += 1
+        return written
+
+
+def _snapshot(paths):
+    """Return (mtime, size) for each path, or None if it does not exist."""
+    stamps = {}
+    for path in paths:
+        try:
+            st = os.stat(path)
+            stamps[path] = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            stamps[path] = None
+    return stamps
+
+
+def watch(interval=DEFAULT_INTERVAL, debounce=DEFAULT_DEBOUNCE):
+    """Poll the inputs forever, rebuilding affected artifacts after each change."""
+    state = EditionState()
+    handlers = state.inputs()
+    # Stamp the inputs before the first build, so saves made during it are seen
+    stamps = _snapshot(handlers)
+
+    all_keys = {(s["id"], sig) for s in state.alignment["sections"]
+                for sig in state.witnesses}
+    written = state.rebuild_segments(all_keys)
+    state.reload_html()
+    print(f"Watching {len(handlers)} files ({written} segment files refreshed). "
+          f"Press Ctrl-C to stop.")
+
+    pending = set()
+    last_change = 0.0
+    try:
+        while True:
+            time.sleep(interval)
+            current = _snapshot(handlers)
+            changed = {p for p in handlers if current[p] != stamps[p]}
+            stamps = current
+            if changed:
+                pending |= changed
+                last_change = time.monotonic()
+                continue
+            if not pending or time.monotonic() - last_change < debounce:
+                continue
+
+            started = time.monotonic()
+            affected = set()
+            for path in sorted(pending):
+                if current[path] is None:
+                    print(f"  {path.name} is missing, skipped")
+                    continue
+                try:
+                    affected |= handlers[path]()
+                except Exception as e:
+                    # Editors save half-finished files; keep watching
+                    print(f"  {path.name}: {e}")
+            written = state.rebuild_segments(affected)
+            elapsed = (time.monotonic() - started) * 1000
+            names = ", ".join(sorted(p.name for p in pending))
+            print(f"[{time.strftime('%H:%M:%S')}] {names}: "
+                  f"{written} segment file(s) rewritten in {elapsed:.0f} ms")
+            pending.clear()
+
+            # The alignment map may have added or removed witnesses. Keep the
+            # stamps taken before the rebuild, so a save made while it ran is
+            # still picked up on the next poll; only new inputs are stamped now.
+            handlers = state.inputs()
+            fresh = _snapshot(p for p in handlers if p not in current)
+            stamps = {p: current[p] if p in current else fresh[p] for p in handlers}
+    except KeyboardInterrupt:
+        print("\nStopped.")
+
+
+def main():
+    args = sys.argv[1:]
+    options = {"--interval": DEFAULT_INTERVAL, "--debounce": DEFAULT_DEBOUNCE}
+    for i, arg in enumerate(args):
+        if arg in options and i + 1 < len(args):
+            options[arg] = float(args[i + 1])
+    watch(interval=options["--interval"], debounce=options["--debounce"])
+
+
+if __name__ == "__main__":
+    main()